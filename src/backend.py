@@ -4,8 +4,13 @@ backend.py
 Includes code for working with network manager programs
 """
 
+import shutil
 import subprocess
 
+# Absolute path of nmcli, resolved once instead of searching $PATH on every call
+_NMCLI = shutil.which("nmcli") or "/usr/bin/nmcli"
+_NMCLI_DEVICE_SET = (_NMCLI, "device", "set")
+
 class NetworkManager(object):
     """ Backend for NetworkManager network manager
     """
@@ -18,10 +23,10 @@ class NetworkManager(object):
     def include(self):
         """ Allow NetworkManager to manage the interface
         """
-        subprocess.check_output(f"nmcli device set {self.iface.iface} managed yes".split(" ")).decode()
+        subprocess.check_call([*_NMCLI_DEVICE_SET, self.iface.iface, "managed", "yes"], stdout=subprocess.DEVNULL)
         return None
 
     def exclude(self):
         """ Disallow NetworkManager from managing the interface
         """
-        subprocess.check_output(f"nmcli device set {self.iface.iface} managed no".split(" ")).decode()
+        subprocess.check_call([*_NMCLI_DEVICE_SET, self.iface.iface, "managed", "no"], stdout=subprocess.DEVNULL)
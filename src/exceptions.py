@@ -16,3 +16,11 @@ class AttributeSetSilentFailError(Exception):
     """
     def __init__(self, message):
         super().__init__(message)
+
+class NetlinkError(SystemCallError):
+    """ Raised when the kernel answers a netlink request with an error, the
+    (positive) errno is kept in the errno attribute
+    """
+    def __init__(self, message, errno):
+        super().__init__(message)
+        self.errno = errno
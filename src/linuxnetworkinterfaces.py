@@ -5,10 +5,501 @@ Module for working with network interfaces in Linux
 """
 
 import os
+import atexit
+import errno
+import fcntl
+import re
 import sys
+import array
+import time
+import socket
+import shutil
+import struct
+import functools
+import itertools
+import threading
 import subprocess
+import collections
 from backend import NetworkManager
-from exceptions import SystemCallError, AttributeSetSilentFailError
+from exceptions import SystemCallError, AttributeSetSilentFailError, NetlinkError
+
+# Absolute paths of the command line tools, resolved once instead of searching $PATH on every call
+_IP = shutil.which("ip") or "/sbin/ip"
+_IW = shutil.which("iw") or "/sbin/iw"
+
+# Fixed argv prefixes shared by every command of the same kind
+_IP_LINK_SET = (_IP, "link", "set")
+_IP_LINK_SHOW = (_IP, "link", "show")
+_IW_DEV = (_IW, "dev")
+
+# Netlink message types, flags and link attributes (linux/netlink.h, linux/rtnetlink.h, linux/if_link.h)
+NETLINK_ROUTE = 0
+NETLINK_GENERIC = 16
+NLMSG_ERROR = 0x2
+NLMSG_DONE = 0x3
+NLM_F_REQUEST = 0x1
+NLM_F_MULTI = 0x2
+NLM_F_DUMP = 0x300
+RTMGRP_LINK = 0x1
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+IFLA_ADDRESS = 1
+IFLA_IFNAME = 3
+IFLA_OPERSTATE = 16
+IFLA_IFALIAS = 20
+IFLA_PERM_ADDRESS = 54
+
+# Generic netlink controller and nl80211 commands and attributes (linux/genetlink.h, linux/nl80211.h)
+GENL_ID_CTRL = 0x10
+CTRL_CMD_GETFAMILY = 3
+CTRL_ATTR_FAMILY_ID = 1
+CTRL_ATTR_FAMILY_NAME = 2
+NL80211_CMD_GET_WIPHY = 1
+NL80211_ATTR_IFINDEX = 3
+NL80211_ATTR_WIPHY_BANDS = 22
+NL80211_ATTR_SPLIT_WIPHY_DUMP = 174
+NL80211_BAND_ATTR_FREQS = 1
+NL80211_FREQUENCY_ATTR_FREQ = 1
+NL80211_FREQUENCY_ATTR_DISABLED = 2
+
+# Interface flag ioctls (linux/sockios.h)
+SIOCGIFFLAGS = 0x8913
+SIOCSIFFLAGS = 0x8914
+
+# Permanent address ethtool ioctl (linux/sockios.h, linux/ethtool.h)
+SIOCETHTOOL = 0x8946
+ETHTOOL_GPERMADDR = 0x20
+MAX_ADDR_LEN = 32
+
+_NLMSGHDR = struct.Struct("=LHHLL")
+_GENLMSGHDR = struct.Struct("=BBH")
+_IFINFOMSG = struct.Struct("=BxHiII")
+_RTATTR = struct.Struct("=HH")
+_IFREQ_FLAGS = struct.Struct("=16sH22x")
+_IFREQ_DATA = struct.Struct("16sP16x")
+_ETHTOOL_PERM_ADDR = struct.Struct("=II")
+
+# Operational states as named by 'ip link show' (RFC 2863, linux/if.h)
+_OPERSTATES = ("unknown", "notpresent", "down", "lowerlayerdown", "testing", "dormant", "up")
+
+# Device flags (linux/if.h)
+IFF_UP = 0x1
+IFF_BROADCAST = 0x2
+IFF_DEBUG = 0x4
+IFF_LOOPBACK = 0x8
+IFF_POINTOPOINT = 0x10
+IFF_NOTRAILERS = 0x20
+IFF_RUNNING = 0x40
+IFF_NOARP = 0x80
+IFF_PROMISC = 0x100
+IFF_ALLMULTI = 0x200
+IFF_MASTER = 0x400
+IFF_SLAVE = 0x800
+IFF_MULTICAST = 0x1000
+IFF_PORTSEL = 0x2000
+IFF_AUTOMEDIA = 0x4000
+IFF_DYNAMIC = 0x8000
+IFF_LOWER_UP = 0x10000
+IFF_DORMANT = 0x20000
+IFF_ECHO = 0x40000
+
+# Device flags in the order 'ip link show' prints them
+_IFF_NAMES = (
+	("LOOPBACK", IFF_LOOPBACK), ("BROADCAST", IFF_BROADCAST), ("POINTOPOINT", IFF_POINTOPOINT), ("MULTICAST", IFF_MULTICAST),
+	("NOARP", IFF_NOARP), ("ALLMULTI", IFF_ALLMULTI), ("PROMISC", IFF_PROMISC), ("MASTER", IFF_MASTER),
+	("SLAVE", IFF_SLAVE), ("NOTRAILERS", IFF_NOTRAILERS), ("DEBUG", IFF_DEBUG), ("DYNAMIC", IFF_DYNAMIC),
+	("AUTOMEDIA", IFF_AUTOMEDIA), ("PORTSEL", IFF_PORTSEL), ("UP", IFF_UP), ("LOWER_UP", IFF_LOWER_UP),
+	("DORMANT", IFF_DORMANT), ("ECHO", IFF_ECHO),
+)
+
+# Patterns for the text output of 'iw dev <iface> info', compiled once at import
+_RE_IW_TYPE = re.compile(r"^\s*type\s+(\S+)", re.MULTILINE)
+_RE_IW_CHANNEL = re.compile(r"^\s*channel\s+(\d+)", re.MULTILINE)
+
+# Validators for setter arguments, so invalid values fail before any system call is made
+_MAC_RE = re.compile(r"(?:[0-9a-fA-F]{2}:){5}[0-9a-fA-F]{2}")
+_STATE_RE = re.compile(r"up|down")
+
+def _nl_align(length):
+	""" Round a netlink length up to the 4 byte boundary
+	"""
+	return (length + 3) & ~3
+
+def _nl_attr(attr_type, data):
+	""" Pack a single netlink attribute
+	"""
+	attr = _RTATTR.pack(_RTATTR.size + len(data), attr_type) + data
+	return attr + b"\0" * (_nl_align(len(attr)) - len(attr))
+
+def _nl_attrs(data, offset=0):
+	""" Parse a stream of netlink attributes into a {type: payload} dict
+	"""
+	attrs = {}
+	while offset + _RTATTR.size <= len(data):
+		length, attr_type = _RTATTR.unpack_from(data, offset)
+		if length < _RTATTR.size:
+			break
+		attrs[attr_type & 0x3fff] = data[offset + _RTATTR.size:offset + length]
+		offset = offset + _nl_align(length)
+	return attrs
+
+# Long-lived request sockets, one per netlink protocol, shared by every query under _NL_LOCK.
+# They belong to the process in _NL_PID, a forked child opens its own instead of sharing the parent's
+_NL_SOCKS = {}
+_NL_LOCK = threading.Lock()
+_NL_SEQ = itertools.count(1)
+_NL_PID = os.getpid()
+
+# Seconds to wait for a netlink reply before giving up on the request
+_NL_TIMEOUT = 5.0
+
+def _nl_after_fork():
+	""" Give a forked child its own netlink state. The inherited sockets are still open in the
+	parent, so only the child's copies of the descriptors are closed
+	"""
+	global _NL_LOCK, _NL_SEQ, _NL_PID
+	for sock in _NL_SOCKS.values():
+		sock.close()
+	_NL_SOCKS.clear()
+	_NL_LOCK = threading.Lock()
+	_NL_SEQ = itertools.count(1)
+	_NL_PID = os.getpid()
+	return None
+
+if hasattr(os, "register_at_fork"):
+	os.register_at_fork(after_in_child=_nl_after_fork)
+
+def _nl_socket(protocol):
+	""" Bound request socket for a netlink protocol, opened on first use. Must be called with _NL_LOCK held
+	"""
+	sock = _NL_SOCKS.get(protocol)
+	if sock is None:
+		sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, protocol)
+		try:
+			sock.bind((0, 0))
+		except OSError:
+			sock.close()
+			raise
+		sock.settimeout(_NL_TIMEOUT)
+		_NL_SOCKS[protocol] = sock
+	return sock
+
+def _nl_close():
+	""" Close the long-lived request sockets
+	"""
+	with _NL_LOCK:
+		if _NL_PID == os.getpid():
+			for sock in _NL_SOCKS.values():
+				sock.close()
+		_NL_SOCKS.clear()
+	return None
+
+atexit.register(_nl_close)
+
+def _nl_request(protocol, msg_type, payload, flags=0):
+	""" Send a single netlink request and return the (type, payload) of every reply message.
+	Replies are matched by sequence number, so leftovers of an earlier request are skipped
+	"""
+	if _NL_PID != os.getpid():
+		# Forked without register_at_fork (Python < 3.7), never share the parent's sockets or sequence numbers
+		_nl_after_fork()
+	with _NL_LOCK:
+		sock = _nl_socket(protocol)
+		seq = next(_NL_SEQ) & 0xffffffff
+		request = _NLMSGHDR.pack(_NLMSGHDR.size + len(payload), msg_type, NLM_F_REQUEST | flags, seq, 0) + payload
+		replies = []
+		try:
+			sock.send(request)
+			while True:
+				data = sock.recv(65536)
+				offset = 0
+				while offset + _NLMSGHDR.size <= len(data):
+					length, reply_type, reply_flags, reply_seq, _ = _NLMSGHDR.unpack_from(data, offset)
+					body = data[offset + _NLMSGHDR.size:offset + length]
+					offset = offset + _nl_align(length)
+					if reply_seq != seq:
+						continue
+					if reply_type == NLMSG_ERROR:
+						error, = struct.unpack_from("=i", body)
+						if error:
+							raise NetlinkError(f"A netlink request returned an error! Full error message: {os.strerror(-error)}", -error)
+						return replies
+					if reply_type == NLMSG_DONE:
+						return replies
+					replies.append((reply_type, body))
+					if not reply_flags & NLM_F_MULTI:
+						return replies
+		except OSError:
+			# Don't reuse a socket left in an unknown state (including a timed out one),
+			# the next request opens a fresh one
+			_NL_SOCKS.pop(protocol).close()
+			raise
+
+def _format_hwaddr(data):
+	""" Format a raw link layer address the way 'ip link show' does
+	"""
+	return ":".join(f"{byte:02x}" for byte in data) if data else None
+
+def _decode_flags(flags):
+	""" Decode an integer of device flags into the list 'ip link show' prints
+	"""
+	flst = ["NO-CARRIER"] if flags & IFF_UP and not flags & IFF_RUNNING else []
+	flst.extend(name for name, bit in _IFF_NAMES if flags & bit)
+	return flst
+
+def _fetch_link_info(iface):
+	""" Query all link attributes of an interface with a single RTM_GETLINK netlink request
+	"""
+	payload = _IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0) + _nl_attr(IFLA_IFNAME, iface.encode() + b"\0")
+	for msg_type, body in _nl_request(NETLINK_ROUTE, RTM_GETLINK, payload):
+		if msg_type == RTM_NEWLINK:
+			_, _, _, flags, _ = _IFINFOMSG.unpack_from(body)
+			attrs = _nl_attrs(body, _IFINFOMSG.size)
+			operstate = attrs.get(IFLA_OPERSTATE, b"\0")[0]
+			# Like 'ip link show', only report the permanent address when it differs from the current one
+			permaddr = attrs.get(IFLA_PERM_ADDRESS)
+			if permaddr == attrs.get(IFLA_ADDRESS):
+				permaddr = None
+			return {
+				"name": attrs[IFLA_IFNAME].rstrip(b"\0").decode(),
+				"alias": attrs[IFLA_IFALIAS].rstrip(b"\0").decode() if attrs.get(IFLA_IFALIAS) else None,
+				"hwaddr": _format_hwaddr(attrs.get(IFLA_ADDRESS)),
+				"permaddr": _format_hwaddr(permaddr),
+				"state": _OPERSTATES[operstate] if operstate < len(_OPERSTATES) else "unknown",
+				"flags": flags,
+			}
+	raise SystemCallError(f"A netlink request for interface '{iface}' returned no link information!")
+
+@functools.lru_cache(maxsize=None)
+def _genl_family(name):
+	""" Resolve the id of a generic netlink family, e.g. nl80211
+	"""
+	payload = _GENLMSGHDR.pack(CTRL_CMD_GETFAMILY, 1, 0) + _nl_attr(CTRL_ATTR_FAMILY_NAME, name.encode() + b"\0")
+	try:
+		replies = _nl_request(NETLINK_GENERIC, GENL_ID_CTRL, payload)
+	except NetlinkError as err:
+		# The controller answers ENOENT for families that are not registered (e.g. no cfg80211)
+		if err.errno == errno.ENOENT:
+			raise SystemCallError(f"The generic netlink family '{name}' is not available!")
+		raise
+	for _, body in replies:
+		attrs = _nl_attrs(body, _GENLMSGHDR.size)
+		if CTRL_ATTR_FAMILY_ID in attrs:
+			return struct.unpack("=H", attrs[CTRL_ATTR_FAMILY_ID][:2])[0]
+	raise SystemCallError(f"The generic netlink family '{name}' is not available!")
+
+def _freq_to_channel(freq):
+	""" Convert a frequency in MHz to its 2.4G or 5G channel number
+	"""
+	if freq == 2484:
+		return 14
+	if freq < 2484:
+		return (freq - 2407) // 5
+	if freq < 5000:
+		return (freq - 4000) // 5
+	return (freq - 5000) // 5
+
+def _fetch_wiphy_freqs(iface):
+	""" Frequencies (MHz) a wireless interface can use, from a split NL80211_CMD_GET_WIPHY dump
+	"""
+	try:
+		ifindex = socket.if_nametoindex(iface)
+	except OSError as err_msg:
+		raise SystemCallError(f"Unable to find the index of interface '{iface}'! Full error message: {err_msg}")
+	payload = _GENLMSGHDR.pack(NL80211_CMD_GET_WIPHY, 0, 0)
+	payload = payload + _nl_attr(NL80211_ATTR_IFINDEX, struct.pack("=I", ifindex))
+	payload = payload + _nl_attr(NL80211_ATTR_SPLIT_WIPHY_DUMP, b"")
+	freqs = []
+	for _, body in _nl_request(NETLINK_GENERIC, _genl_family("nl80211"), payload, flags=NLM_F_DUMP):
+		bands = _nl_attrs(body, _GENLMSGHDR.size).get(NL80211_ATTR_WIPHY_BANDS)
+		if bands is None:
+			continue
+		for band in _nl_attrs(bands).values():
+			for freq in _nl_attrs(_nl_attrs(band).get(NL80211_BAND_ATTR_FREQS, b"")).values():
+				fattrs = _nl_attrs(freq)
+				if NL80211_FREQUENCY_ATTR_FREQ in fattrs and NL80211_FREQUENCY_ATTR_DISABLED not in fattrs:
+					freqs.append(struct.unpack("=I", fattrs[NL80211_FREQUENCY_ATTR_FREQ][:4])[0])
+	return freqs
+
+def _field_after(sstr, key):
+	""" Token following ' key ' in 'ip link show' output, or None if key is absent
+	"""
+	i = sstr.find(f" {key} ")
+	if i < 0:
+		return None
+	i = i + len(key) + 2
+	j = min(k for k in (sstr.find(" ", i), sstr.find("\n", i), len(sstr)) if k >= 0)
+	return sstr[i:j]
+
+def _read_sysfs(iface, attr):
+	""" Read a single attribute of an interface from /sys/class/net, or None if
+	the kernel refuses to report it (e.g. carrier while the interface is down)
+	"""
+	try:
+		with open(f"/sys/class/net/{iface}/{attr}") as fp:
+			return fp.read().strip()
+	except FileNotFoundError:
+		raise SystemCallError(f"Unable to read the '{attr}' attribute of interface '{iface}' from sysfs!")
+	except OSError:
+		return None
+
+# Stands in for the permanent address in snapshots read from sysfs, which does not expose it
+_PERMADDR_UNREAD = object()
+
+def _read_permaddr(iface, hwaddr):
+	""" Permanent address of an interface via ETHTOOL_GPERMADDR, used when the snapshot came from
+	sysfs. Like 'ip link show' it is None when unset or equal to the current address. Only if
+	the ioctl is unavailable is the address parsed from 'ip link show'
+	"""
+	buf = array.array("B", _ETHTOOL_PERM_ADDR.pack(ETHTOOL_GPERMADDR, MAX_ADDR_LEN) + bytes(MAX_ADDR_LEN))
+	try:
+		with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+			fcntl.ioctl(sock, SIOCETHTOOL, _IFREQ_DATA.pack(iface.encode(), buf.buffer_info()[0]))
+	except OSError:
+		try:
+			sstr = subprocess.check_output([*_IP_LINK_SHOW, iface]).decode()
+		except subprocess.CalledProcessError as err_msg:
+			raise SystemCallError(f"A system-level command returned a non-zero exit code! Full error message: {err_msg}")
+		return _field_after(sstr, "permaddr")
+	_, size = _ETHTOOL_PERM_ADDR.unpack_from(buf)
+	data = bytes(buf[_ETHTOOL_PERM_ADDR.size:_ETHTOOL_PERM_ADDR.size + size])
+	permaddr = _format_hwaddr(data) if any(data) else None
+	return None if permaddr == hwaddr else permaddr
+
+def _read_sysfs_link(iface):
+	""" Read the same link attributes _fetch_link_info() returns from sysfs, without
+	forking. sysfs does not expose the permanent address, so __permaddr__ reads it
+	separately, and only when asked for
+	"""
+	# The flags file holds dev->flags, so add the operational bits the kernel computes for netlink
+	flags = int(_read_sysfs(iface, "flags"), 16)
+	state = _read_sysfs(iface, "operstate")
+	if flags & IFF_UP:
+		if state in ("up", "unknown"):
+			flags = flags | IFF_RUNNING
+		if _read_sysfs(iface, "carrier") == "1":
+			flags = flags | IFF_LOWER_UP
+		if _read_sysfs(iface, "dormant") == "1":
+			flags = flags | IFF_DORMANT
+	
+	return {
+		"name": iface,
+		"alias": _read_sysfs(iface, "ifalias") or None,
+		"hwaddr": _read_sysfs(iface, "address") or None,
+		"permaddr": _PERMADDR_UNREAD,
+		"state": state,
+		"flags": flags,
+	}
+
+# Link snapshots are shared between objects for the same interface for up to this many seconds
+# when link change notifications are unavailable
+_SNAPSHOT_TTL = 1.0
+
+_Snapshot = collections.namedtuple("_Snapshot", ("name", "alias", "hwaddr", "permaddr", "state", "flags"))
+
+# Background thread subscribed to RTMGRP_LINK, and the number of link changes it has seen
+_link_watcher = None
+_link_generation = 0
+
+def _tick():
+	""" Current snapshot cache tick. While the link watcher is running this only
+	advances when the kernel reports a link change, otherwise every _SNAPSHOT_TTL seconds
+	"""
+	if _link_watcher is not None and _link_watcher.is_alive():
+		return _link_generation
+	return int(time.monotonic() // _SNAPSHOT_TTL)
+
+@functools.lru_cache(maxsize=64)
+def _snapshot(iface, tick):
+	""" Immutable link attributes of an interface, fetched over netlink and
+	cached per (iface, tick) so changes show up as soon as the tick advances
+	"""
+	try:
+		info = _fetch_link_info(iface)
+	except OSError:
+		# Netlink sockets are unavailable (e.g. a restricted sandbox), so fall back to sysfs
+		info = _read_sysfs_link(iface)
+	return _Snapshot(**info)
+
+def _watch_links(sock):
+	""" Advance the snapshot tick whenever the kernel announces a new, changed or removed link.
+	Keying snapshots by the tick rather than clearing the cache means a lookup racing with
+	a change can only ever store its result under the old, no longer used tick
+	"""
+	global _link_generation
+	with sock:
+		while True:
+			try:
+				data = sock.recv(65536)
+			except OSError as err:
+				if err.errno != errno.ENOBUFS:
+					break
+				# The socket overran and notifications were lost, so assume everything changed
+				_link_generation = _link_generation + 1
+				continue
+			offset = 0
+			while offset + _NLMSGHDR.size <= len(data):
+				length, msg_type, _, _, _ = _NLMSGHDR.unpack_from(data, offset)
+				if msg_type in (RTM_NEWLINK, RTM_DELLINK):
+					_link_generation = _link_generation + 1
+					break
+				offset = offset + _nl_align(length)
+	# Without notifications the time based tick takes over, so drop anything keyed by generation
+	_snapshot.cache_clear()
+
+def _start_link_watcher():
+	""" Subscribe to link change notifications, if netlink is available
+	"""
+	global _link_watcher
+	try:
+		sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+		sock.bind((0, RTMGRP_LINK))
+	except OSError:
+		return None
+	_link_watcher = threading.Thread(target=_watch_links, args=(sock,), name="linuxnetworkinterfaces-link-watcher", daemon=True)
+	_link_watcher.start()
+	return None
+
+_start_link_watcher()
+
+def _set_link_up(iface, up):
+	""" Set or clear IFF_UP with SIOCGIFFLAGS/SIOCSIFFLAGS. Returns False if the
+	ioctl could not be used (e.g. not permitted), so the caller can fall back to ip
+	"""
+	ifname = iface.encode()
+	try:
+		with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+			_, flags = _IFREQ_FLAGS.unpack(fcntl.ioctl(sock, SIOCGIFFLAGS, _IFREQ_FLAGS.pack(ifname, 0)))
+			flags = flags | IFF_UP if up else flags & ~IFF_UP
+			fcntl.ioctl(sock, SIOCSIFFLAGS, _IFREQ_FLAGS.pack(ifname, flags))
+	except OSError:
+		return False
+	return True
+
+def _query_iw_info(iface):
+	""" Output of 'iw dev <iface> info'
+	"""
+	try:
+		return subprocess.check_output([*_IW_DEV, iface, "info"]).decode()
+	except subprocess.CalledProcessError as err_msg:
+		raise SystemCallError(f"A system-level command returned a non-zero exit code! Full error message: {err_msg}")
+
+# Attributes loaded on first access, and the getter method that loads each of them
+_LAZY_GETTERS = {
+	"name": "__name__",
+	"alias": "__alias__",
+	"hwaddr": "__hwaddr__",
+	"permaddr": "__permaddr__",
+	"state": "__state__",
+	"device_flags": "__flags__",
+	"noarp": "__noarp__",
+	"multicast": "__multicast__",
+	"allmulti": "__allmulti__",
+	"promisc": "__promisc__",
+	"mode": "__mode__",
+	"channel": "__channel__",
+}
 
 class Interface(object):
 	""" Generic parent class object. Represents and controls a
@@ -18,126 +509,126 @@ class Interface(object):
 		__init__() - Initialize the object
 	"""
 	
+	__slots__ = (
+		"iface", "name", "alias", "hwaddr", "permaddr", "state",
+		"device_flags", "noarp", "multicast", "allmulti", "promisc",
+		"_flag_setters", "debug", "iface_type", "manager", "manager_backend",
+	)
+	
 	def __init__(self, iface, debug=False):
 		""" Initialize the object
 		"""
-		# Interface
+		# Interface (name, alias, hwaddr, state, device flags, etc. are loaded on first access by __getattr__)
 		self.iface = iface
-		self.name = self.__name__()
-		self.alias = self.__alias__()
-		self.hwaddr = self.__hwaddr__()
-		self.permaddr = self.__permaddr__()
 		
-		# State
-		self.state = self.__state__()
-				
 		# Device flags
-		self.device_flags = self.__flags__()
-		self.noarp = self.__noarp__()
-		self.multicast = self.__multicast__()
-		self.allmulti = self.__allmulti__()
-		self.promisc = self.__promisc__()
+		self._flag_setters = {
+			"noarp": self.__noarp__,
+			"multicast": self.__multicast__,
+			"allmulti": self.__allmulti__,
+			"promisc": self.__promisc__,
+		}
 		
 		# Messages & error handling
 		self.debug = debug
 		
+	def __getattr__(self, name):
+		""" Load an attribute listed in _LAZY_GETTERS through its getter the first
+		time it is accessed and keep the result, so unused attributes cost nothing
+		"""
+		getter = _LAZY_GETTERS.get(name)
+		if getter is None or not hasattr(type(self), getter):
+			raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+		value = getattr(self, getter)()
+		object.__setattr__(self, name, value)
+		return value
+		
+	def __link__(self):
+		""" Link attributes of the interface, shared by all getters and by
+		other objects for the same interface until a setter changes them
+		"""
+		return _snapshot(self.iface, _tick())
+		
+	@staticmethod
+	def invalidate(iface=None):
+		""" Drop cached link snapshots so the next read queries the kernel again.
+		functools.lru_cache cannot evict a single key, so this clears the
+		snapshots of every interface, not only iface
+		"""
+		_snapshot.cache_clear()
+		return None
+		
 	def __name__(self, set_name=None):
 		""" Interface name
 		"""
 		if set_name is not None:
 			try:
-				subprocess.check_call(f"ip link set {self.iface} name {set_name}".split(" "))
+				subprocess.check_call([*_IP_LINK_SET, self.iface, "name", set_name], stdout=subprocess.DEVNULL)
 			except subprocess.CalledProcessError as err_msg:
 				raise SystemCallError(f"A system-level command returned a non-zero exit code! Full error message: {err_msg}")
 			self.iface = set_name
-		return self.iface
+			self.invalidate(self.iface)
+		return self.__link__().name
 		
 	def __alias__(self, set_alias=None):
 		""" Interface alias name
 		"""
 		if set_alias is not None:
 			try:
-				subprocess.check_call(f"ip link set {self.iface} alias {set_alias}".split(" "))
+				subprocess.check_call([*_IP_LINK_SET, self.iface, "alias", set_alias], stdout=subprocess.DEVNULL)
 			except subprocess.CalledProcessError as err_msg:
 				raise SystemCallError(f"A system-level command returned a non-zero exit code! Full error message: {err_msg}")
-			
-		sstr = subprocess.check_output(f"ip link show {self.iface}".split(" ")).decode(); slst = sstr.split(" ")
-		alias = None
-		index = 0
-		for part in slst:
-			if part == "alias":
-				alias = slst[index + 1]
-			index = index + 1
-		return alias
+			self.invalidate(self.iface)
+		return self.__link__().alias
 		
 	def __hwaddr__(self, set_hwaddr=None):
 		""" MAC address used by the interface
 		"""
 		if set_hwaddr is not None:
 			try:
-				subprocess.check_call(f"ip link set {self.iface} address {set_hwaddr}".split(" "))
+				subprocess.check_call([*_IP_LINK_SET, self.iface, "address", set_hwaddr], stdout=subprocess.DEVNULL)
 			except subprocess.CalledProcessError as err_msg:
 				raise SystemCallError(f"A system-level command returned a non-zero exit code! Full error message: {err_msg}")
-		
-		sstr = subprocess.check_output(f"ip link show {self.iface}".split(" ")).decode(); slst = sstr.split(" ")
-		hwaddr = None
-		index = 0
-		for part in slst:
-			if part == "link/ether":
-				hwaddr = slst[index + 1]
-			index = index + 1
-		return hwaddr
-		
+			self.invalidate(self.iface)
+		return self.__link__().hwaddr
 		
 	def __permaddr__(self):
 		""" Permanent MAC address of the device
 		"""
-		sstr = subprocess.check_output(f"ip link show {self.iface}".split(" ")).decode(); slst = sstr.split(" ")
-		permaddr = None
-		index = 0
-		for part in slst:
-			if part == "permaddr":
-				permaddr = slst[index + 1]
-			index = index + 1
-		return permaddr
+		info = self.__link__()
+		if info.permaddr is _PERMADDR_UNREAD:
+			return _read_permaddr(self.iface, info.hwaddr)
+		return info.permaddr
 		
 	def __state__(self, set_state=None):
 		""" Interface state
 		"""
 		if set_state is not None:
-			try:
-				subprocess.check_call(f"ip link set {self.iface} {set_state}".split(" "))
-			except subprocess.CalledProcessError as err_msg:
-				raise SystemCallError(f"A system-level command returned a non-zero exit code! Full error message: {err_msg}")
-		sstr = subprocess.check_output(f"ip link show {self.iface}".split(" ")).decode(); slst = sstr.split(" ")
-		state = None
-		index = 0
-		for part in slst:
-			if part == "state":
-				state = slst[index + 1].lower()
-			index = index + 1
-		return state
+			# Bring the link up or down with a single ioctl, and only fall back to ip when that is not possible
+			if set_state not in ("up", "down") or not _set_link_up(self.iface, set_state == "up"):
+				try:
+					subprocess.check_call([*_IP_LINK_SET, self.iface, set_state], stdout=subprocess.DEVNULL)
+				except subprocess.CalledProcessError as err_msg:
+					raise SystemCallError(f"A system-level command returned a non-zero exit code! Full error message: {err_msg}")
+			self.invalidate(self.iface)
+		return self.__link__().state
 		
 	def __flags__(self):
 		""" Return a list of device flags
 		"""
-		sstr = subprocess.check_output(f"ip link show {self.iface}".split(" ")).decode(); slst = sstr.split(" ")
-		fstr = slst[2].strip("<>"); flst = fstr.split(",")
-		return flst
+		return _decode_flags(self.__link__().flags)
 		
 	def __noarp__(self, set_flag=None):
 		""" NOARP device flag
 		"""
 		if set_flag is not None:
-			sopt = "on" if set_flag == True else "off"
+			sopt = "off" if set_flag == True else "on"
 			try:
-				subprocess.check_call(f"ip link set {self.iface} arp {sopt}]".split(" "))
+				subprocess.check_call([*_IP_LINK_SET, self.iface, "arp", sopt], stdout=subprocess.DEVNULL)
 			except subprocess.CalledProcessError as err_msg:
 				raise SystemCallError(f"A system-level command returned a non-zero exit code! Full error message: {err_msg}")
-		has_flag = False
-		if "NOARP" in self.__flags__():
-			has_flag = True
-		return has_flag
+			self.invalidate(self.iface)
+		return bool(self.__link__().flags & IFF_NOARP)
 		
 	def __multicast__(self, set_flag=None):
 		""" MULTICAST device flag
@@ -145,13 +636,11 @@ class Interface(object):
 		if set_flag is not None:
 			sopt = "on" if set_flag == True else "off"
 			try:
-				subprocess.check_call(f"ip link set {self.iface} multicast {sopt}]".split(" "))
+				subprocess.check_call([*_IP_LINK_SET, self.iface, "multicast", sopt], stdout=subprocess.DEVNULL)
 			except subprocess.CalledProcessError as err_msg:
 				raise SystemCallError(f"A system-level command returned a non-zero exit code! Full error message: {err_msg}")
-		has_flag = False
-		if "MULTICAST" in self.__flags__():
-			has_flag = True
-		return has_flag
+			self.invalidate(self.iface)
+		return bool(self.__link__().flags & IFF_MULTICAST)
 		
 	def __allmulti__(self, set_flag=None):
 		""" ALLMULTI device flag
@@ -159,52 +648,40 @@ class Interface(object):
 		if set_flag is not None:
 			sopt = "on" if set_flag == True else "off"
 			try:
-				subprocess.check_call(f"ip link set {self.iface} allmulticast {sopt}]".split(" "))
+				subprocess.check_call([*_IP_LINK_SET, self.iface, "allmulticast", sopt], stdout=subprocess.DEVNULL)
 			except subprocess.CalledProcessError as err_msg:
 				raise SystemCallError(f"A system-level command returned a non-zero exit code! Full error message: {err_msg}")
-		has_flag = False
-		if "ALLMULTICAST" in self.__flags__():
-			has_flag = True
-		return has_flag
+			self.invalidate(self.iface)
+		return bool(self.__link__().flags & IFF_ALLMULTI)
 		
 	def __promisc__(self, set_flag=None):
 		""" PROMISC device flag"""
 		if set_flag is not None:
 			sopt = "on" if set_flag == True else "off"
 			try:
-				subprocess.check_call(f"ip link set {self.iface} promisc {sopt}".split(" "))
+				subprocess.check_call([*_IP_LINK_SET, self.iface, "promisc", sopt], stdout=subprocess.DEVNULL)
 			except subprocess.CalledProcessError as err_msg:
 				raise SystemCallError(f"A system-level command returned a non-zero exit code! Full error message: {err_msg}")
-		has_flag = False
-		if "PROMISC" in self.__flags__():
-			has_flag = True
-		return has_flag
+			self.invalidate(self.iface)
+		return bool(self.__link__().flags & IFF_PROMISC)
 		
 	def set_device_flag(self, flag, setting):
 		""" Set a device flag
 		"""
 		# Determine the proper flag setting value & handle bad setting argument values
 		sval = "on" if setting in ("on", True) else "off" if setting in ("off", False) else None
-		if not setting:
-			self.__error_handler__(f"Invalid device flag setting '{setting}'!")
+		if sval is None:
+			raise ValueError(f"Invalid device flag setting '{setting}'!")
 			
-		# Set the flag through the appropriate method or call the error handler method if a non-existent flag was specified
-		if flag.lower() == "noarp":
-			flag_set = self.__noarp__(set_flag=setting)
-		elif flag.lower() == "multicast":
-			flag_set = self.__multicast__(set_flag=setting)
-		elif flag.lower() == "allmulti":
-			flag_set = self.__allmulti___(set_flag=setting)
-		elif flag.lower() == "promisc":
-			flag_set = self.__promisc__(set_flag=setting)
-		else:
-			raise Exception(f"Unsupported flag '{flag}'!")
-			return False
+		# Set the flag through the appropriate method or raise an error if a non-existent flag was specified
+		set_flag = self._flag_setters.get(flag.lower())
+		if set_flag is None:
+			raise ValueError(f"Unsupported flag '{flag}'!")
+		flag_set = set_flag(set_flag=(sval == "on"))
 			
-		# Make sure the flag was set and return False if it failed
-		if not flag_set:
+		# Make sure the flag was set and raise an error if it failed
+		if flag_set != (sval == "on"):
 			raise AttributeSetSilentFailError(f"Tried to set the value of the '{flag}' device flag but its value remains unchanged!")
-			return False
 			
 		# Return True upon success
 		return True
@@ -239,6 +716,8 @@ class Interface(object):
 	def set_hwaddr(self, hwaddr):
 		""" Set a cloned MAC address
 		"""
+		if not _MAC_RE.fullmatch(hwaddr):
+			raise ValueError(f"Invalid hardware address '{hwaddr}'!")
 		cur = self.__hwaddr__()
 		self.hwaddr = self.__hwaddr__(set_hwaddr=hwaddr)
 		if self.hwaddr == cur:
@@ -248,6 +727,8 @@ class Interface(object):
 	def set_state(self, state):
 		""" Set the interface's state
 		"""
+		if not _STATE_RE.fullmatch(state):
+			raise ValueError(f"Invalid interface state '{state}'!")
 		cur = self.__state__()
 		self.state = self.__state__(set_state=state)
 		if self.state == cur:
@@ -261,6 +742,8 @@ class WiredInterface(Interface):
 		__init__() - Initialize the object
 	"""
 	
+	__slots__ = ()
+	
 	def __init__(self, iface, manager=None, debug=False):
 		""" Initialize the object
 		"""
@@ -278,62 +761,63 @@ class WirelessInterface(Interface):
 		__init__() - Initialize the object
 	"""
 	
+	__slots__ = ("default_mode", "mode", "channel", "_iw_info")
+	
 	def __init__(self, iface, manager=None, debug=False):
 		""" Initialize the object
 		"""
 		super().__init__(iface, debug=debug)
+		self._iw_info = None
 		self.iface_type = "wireless"
 		self.manager = manager
 		self.manager_backend = None
 		if self.manager == "networkmanager":
 			self.manager_backend = NetworkManager(self)
 		self.default_mode = "managed"
-		self.mode = self.__mode__()
-		self.channel = self.__channel__()
+		
+	def __iw_info__(self):
+		""" Output of 'iw dev <iface> info', fetched once and shared by the
+		mode and channel getters until a setter changes them
+		"""
+		if self._iw_info is None:
+			self._iw_info = _query_iw_info(self.iface)
+		return self._iw_info
 		
 	def __mode__(self, set_mode=None):
 		""" Get or set the mode
 		"""
 		if set_mode is not None:
 			try:
-				subprocess.check_call(f"iw dev {self.iface} set type {set_mode}".split(" "))
+				subprocess.check_call([*_IW_DEV, self.iface, "set", "type", set_mode], stdout=subprocess.DEVNULL)
 			except subprocess.CalledProcessError as err_msg:
 				raise SystemCallError(f"A system-level command returned a non-zero exit code! Full error message: {err_msg}")
-			
-		sstr = subprocess.check_output(f"iw dev {self.iface} info".split(" ")).decode(); slst = sstr.split(" ")
-		mode = None
-		index = 0
-		for part in slst:
-			if "type" in part:
-				mstr = slst[index + 1]
-				mode, _ = mstr.split("\n\t")
-				break
-			index = index + 1
-		return mode
+			self._iw_info = None
+		m = _RE_IW_TYPE.search(self.__iw_info__())
+		return m.group(1) if m else None
 		
 	def __channel__(self, set_channel=None):
 		""" Get or set the channel
 		"""
 		if set_channel is not None:
 			try:
-				subprocess.check_call(f"iw dev {self.iface} set channel {str(set_channel)}".split(" "))
+				subprocess.check_call([*_IW_DEV, self.iface, "set", "channel", str(set_channel)], stdout=subprocess.DEVNULL)
 			except subprocess.CalledProcessError as err_msg:
 				raise SystemCallError(f"A system-level command returned a non-zero exit code! Full error message: {err_msg}")
-			
-		sstr = subprocess.check_output(f"iw dev {self.iface} info".split(" ")).decode(); slst = sstr.split(" ")
-		channel = None
-		index = 0
-		for part in slst:
-			if "channel" in part:
-				channel = int(slst[index + 1])
-				break
-			index = index + 1
-		return channel
+			self._iw_info = None
+		m = _RE_IW_CHANNEL.search(self.__iw_info__())
+		return int(m.group(1)) if m else None
 		
 	def get_supported_channels(self):
 		""" Get a list of the 2.4G and 5G channels supported by the interface
 		"""
-		pass
+		channels_2g = array.array("i")
+		channels_5g = array.array("i")
+		for freq in _fetch_wiphy_freqs(self.iface):
+			if 2400 <= freq < 2500:
+				channels_2g.append(_freq_to_channel(freq))
+			elif 4900 <= freq < 5900:
+				channels_5g.append(_freq_to_channel(freq))
+		return channels_2g, channels_5g
 
 	def set_mode(self, mode):
 		""" Set the interface's mode
@@ -0,0 +1,145 @@
+"""
+test_netlink.py
+
+Tests for the netlink attribute parsing and nl80211 channel lookup, run against
+synthetic replies so no wireless hardware is needed
+"""
+
+import os
+import sys
+import errno
+import struct
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import linuxnetworkinterfaces as lni
+from exceptions import SystemCallError, NetlinkError
+
+NLA_F_NESTED = 0x8000
+NL80211_FAMILY_ID = 0x1c
+
+def freq_attr(freq, disabled=False):
+	""" Payload of a single nl80211 frequency entry
+	"""
+	attr = lni._nl_attr(lni.NL80211_FREQUENCY_ATTR_FREQ, struct.pack("=I", freq))
+	if disabled:
+		attr = attr + lni._nl_attr(lni.NL80211_FREQUENCY_ATTR_DISABLED, b"")
+	return attr
+
+def band_attr(freqs):
+	""" Payload of a single nl80211 band holding the given frequency entries
+	"""
+	entries = b"".join(lni._nl_attr(index | NLA_F_NESTED, freq) for index, freq in enumerate(freqs))
+	return lni._nl_attr(lni.NL80211_BAND_ATTR_FREQS | NLA_F_NESTED, entries)
+
+def wiphy_reply(bands):
+	""" Body of a NL80211_CMD_NEW_WIPHY message carrying the given bands
+	"""
+	nest = b"".join(lni._nl_attr(index | NLA_F_NESTED, band) for index, band in bands)
+	return lni._GENLMSGHDR.pack(3, 1, 0) + lni._nl_attr(lni.NL80211_ATTR_WIPHY_BANDS | NLA_F_NESTED, nest)
+
+class NetlinkAttributeTests(unittest.TestCase):
+	""" Packing and parsing of netlink attribute streams
+	"""
+
+	def test_round_trip_pads_to_four_bytes(self):
+		data = lni._nl_attr(1, b"abc") + lni._nl_attr(2, struct.pack("=I", 7)) + lni._nl_attr(3, b"")
+		self.assertEqual(len(data), 8 + 8 + 4)
+		self.assertEqual(lni._nl_attrs(data), {1: b"abc", 2: struct.pack("=I", 7), 3: b""})
+
+	def test_nested_flag_is_masked_and_offset_respected(self):
+		data = b"\0" * 4 + lni._nl_attr(5 | NLA_F_NESTED, lni._nl_attr(1, b"x"))
+		attrs = lni._nl_attrs(data, 4)
+		self.assertEqual(list(attrs), [5])
+		self.assertEqual(lni._nl_attrs(attrs[5]), {1: b"x"})
+
+	def test_truncated_stream_stops(self):
+		self.assertEqual(lni._nl_attrs(lni._nl_attr(1, b"abcd")[:6]), {1: b"ab"})
+		self.assertEqual(lni._nl_attrs(struct.pack("=HH", 2, 1)), {})
+
+class FreqToChannelTests(unittest.TestCase):
+	""" Frequency to channel number conversion
+	"""
+
+	def test_2g(self):
+		self.assertEqual([lni._freq_to_channel(f) for f in (2412, 2437, 2472)], [1, 6, 13])
+
+	def test_channel_14(self):
+		self.assertEqual(lni._freq_to_channel(2484), 14)
+
+	def test_4g9(self):
+		self.assertEqual([lni._freq_to_channel(f) for f in (4915, 4920, 4980)], [183, 184, 196])
+
+	def test_5g(self):
+		self.assertEqual([lni._freq_to_channel(f) for f in (5180, 5500, 5825, 5885)], [36, 100, 165, 177])
+
+class WiphyFreqTests(unittest.TestCase):
+	""" Walking split NL80211_CMD_GET_WIPHY dumps
+	"""
+
+	def setUp(self):
+		patches = (
+			mock.patch.object(lni, "_genl_family", return_value=NL80211_FAMILY_ID),
+			mock.patch.object(lni.socket, "if_nametoindex", return_value=4),
+		)
+		for patch in patches:
+			patch.start()
+			self.addCleanup(patch.stop)
+
+	def test_collects_enabled_freqs_across_split_messages(self):
+		replies = [
+			(NL80211_FAMILY_ID, lni._GENLMSGHDR.pack(3, 1, 0)),
+			(NL80211_FAMILY_ID, wiphy_reply([(0, band_attr([freq_attr(2412), freq_attr(2467, disabled=True)]))])),
+			(NL80211_FAMILY_ID, wiphy_reply([(0, band_attr([freq_attr(2484)])), (1, band_attr([freq_attr(4920), freq_attr(5180)]))])),
+		]
+		with mock.patch.object(lni, "_nl_request", return_value=replies) as request:
+			self.assertEqual(lni._fetch_wiphy_freqs("wlan0"), [2412, 2484, 4920, 5180])
+		protocol, family, payload = request.call_args[0]
+		self.assertEqual((protocol, family), (lni.NETLINK_GENERIC, NL80211_FAMILY_ID))
+		self.assertEqual(request.call_args[1], {"flags": lni.NLM_F_DUMP})
+		attrs = lni._nl_attrs(payload, lni._GENLMSGHDR.size)
+		self.assertEqual(attrs[lni.NL80211_ATTR_IFINDEX], struct.pack("=I", 4))
+		self.assertIn(lni.NL80211_ATTR_SPLIT_WIPHY_DUMP, attrs)
+
+	def test_get_supported_channels_splits_bands(self):
+		freqs = [2412, 2437, 2484, 4920, 5180, 5825, 5955]
+		iface = object.__new__(lni.WirelessInterface)
+		iface.iface = "wlan0"
+		with mock.patch.object(lni, "_fetch_wiphy_freqs", return_value=freqs):
+			channels_2g, channels_5g = iface.get_supported_channels()
+		self.assertEqual((channels_2g.typecode, list(channels_2g)), ("i", [1, 6, 14]))
+		self.assertEqual((channels_5g.typecode, list(channels_5g)), ("i", [184, 36, 165]))
+
+	def test_unknown_interface_raises_system_call_error(self):
+		with mock.patch.object(lni.socket, "if_nametoindex", side_effect=OSError("no interface with this name")):
+			self.assertRaises(SystemCallError, lni._fetch_wiphy_freqs, "nope0")
+
+class GenlFamilyTests(unittest.TestCase):
+	""" Resolving generic netlink family ids
+	"""
+
+	def setUp(self):
+		lni._genl_family.cache_clear()
+		self.addCleanup(lni._genl_family.cache_clear)
+
+	def test_family_id(self):
+		reply = lni._GENLMSGHDR.pack(1, 2, 0) + lni._nl_attr(lni.CTRL_ATTR_FAMILY_ID, struct.pack("=H", NL80211_FAMILY_ID))
+		with mock.patch.object(lni, "_nl_request", return_value=[(lni.GENL_ID_CTRL, reply)]):
+			self.assertEqual(lni._genl_family("nl80211"), NL80211_FAMILY_ID)
+
+	def test_missing_family(self):
+		error = NetlinkError("No such file or directory", errno.ENOENT)
+		with mock.patch.object(lni, "_nl_request", side_effect=error):
+			with self.assertRaisesRegex(SystemCallError, "family 'nl80211' is not available"):
+				lni._genl_family("nl80211")
+
+	def test_other_errors_propagate(self):
+		error = NetlinkError("Operation not permitted", errno.EPERM)
+		with mock.patch.object(lni, "_nl_request", side_effect=error):
+			with self.assertRaises(NetlinkError):
+				lni._genl_family("nl80211")
+
+if __name__ == "__main__":
+	unittest.main()